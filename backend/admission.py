@@ -0,0 +1,91 @@
+# admission.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """Raised when a playlist fetch cannot be admitted right now."""
+
+    def __init__(self, message, status_code, retry_after):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class PlaylistFetchLimiter:
+    """Per-user and global concurrency caps for expensive playlist fetches.
+
+    Requests over a cap are rejected immediately instead of queueing, so
+    cheap routes never wait behind a backlog of playlist ingests.
+    """
+
+    def __init__(self, max_global, max_per_user, default_retry_after=5, smoothing=0.2):
+        self.max_global = max_global
+        self.max_per_user = max_per_user
+        self.default_retry_after = default_retry_after
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._active = 0
+        self._active_by_user = {}
+        self._avg_duration = None
+
+    def retry_after(self):
+        """Suggested Retry-After in seconds, based on recent fetch durations."""
+        with self._lock:
+            avg_duration = self._avg_duration
+        if avg_duration is None:
+            return self.default_retry_after
+        return max(1, int(round(avg_duration)))
+
+    def _try_acquire(self, user_id):
+        with self._lock:
+            if self._active_by_user.get(user_id, 0) >= self.max_per_user:
+                return 429, 'Too many playlist imports in progress for this user'
+            if self._active >= self.max_global:
+                return 503, 'Server is busy importing playlists, please retry shortly'
+            self._active += 1
+            self._active_by_user[user_id] = self._active_by_user.get(user_id, 0) + 1
+            return None
+
+    def _release(self, user_id, duration=None):
+        """Free a fetch slot; `duration` is only given for fetches that completed."""
+        with self._lock:
+            self._active -= 1
+            remaining = self._active_by_user[user_id] - 1
+            if remaining:
+                self._active_by_user[user_id] = remaining
+            else:
+                del self._active_by_user[user_id]
+            if duration is None:
+                return
+            if self._avg_duration is None:
+                self._avg_duration = duration
+            else:
+                self._avg_duration += self.smoothing * (duration - self._avg_duration)
+
+    @contextmanager
+    def admit(self, user_id):
+        """Hold a fetch slot for `user_id` or raise AdmissionRejected."""
+        rejection = self._try_acquire(user_id)
+        if rejection:
+            status_code, message = rejection
+            raise AdmissionRejected(message, status_code, self.retry_after())
+        started = time.monotonic()
+        duration = None
+        try:
+            yield
+            duration = time.monotonic() - started
+        finally:
+            self._release(user_id, duration)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': self._active,
+                'active_users': len(self._active_by_user),
+                'max_global': self.max_global,
+                'max_per_user': self.max_per_user,
+            }
@@ -12,8 +12,10 @@ from model import (
     create_schedule_time_based,
     create_schedule_day_based,
     validate_playlist_url,
-    get_schedule_summary
+    get_schedule_summary,
+    PlaylistTooLargeError
 )
+from admission import PlaylistFetchLimiter, AdmissionRejected
 
 # Load environment variables
 load_dotenv()
@@ -26,7 +28,7 @@ CORS(app, resources={
         "origins": ["http://localhost:3000"],
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"],
-        "expose_headers": ["Content-Type", "Authorization"],
+        "expose_headers": ["Content-Type", "Authorization", "Retry-After"],
         "supports_credentials": True,
         "max_age": 120
     }
@@ -44,6 +46,14 @@ GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
 genai.configure(api_key=GOOGLE_API_KEY)
 model = genai.GenerativeModel('gemini-pro')
 
+# Admission control for playlist fetches
+MAX_PLAYLIST_VIDEOS = int(os.getenv('MAX_PLAYLIST_VIDEOS', 500))
+playlist_fetch_limiter = PlaylistFetchLimiter(
+    max_global=int(os.getenv('MAX_CONCURRENT_PLAYLIST_FETCHES', 4)),
+    max_per_user=int(os.getenv('MAX_CONCURRENT_PLAYLIST_FETCHES_PER_USER', 1)),
+    default_retry_after=int(os.getenv('PLAYLIST_FETCH_RETRY_AFTER', 5))
+)
+
 # Helper Functions
 def validate_object_id(id_string: str) -> bool:
     try:
@@ -65,7 +75,9 @@ def format_schedule_response(schedule):
         if isinstance(day_schedule['date'], datetime):
             day_schedule['date'] = day_schedule['date'].strftime('%Y-%m-%d')
     
-    return schedule# Middleware for handling preflight requests
+    return schedule
+
+# Middleware for handling preflight requests
 @app.before_request
 def handle_preflight():
     if request.method == "OPTIONS":
@@ -97,16 +109,9 @@ def get_schedule_detail(schedule_id):
         print(f"Error fetching schedule: {str(e)}")
         return jsonify({'error': 'Failed to fetch schedule'}), 500
 
-@app.route('/api/schedule', methods=['POST', 'OPTIONS'])
-def create_schedule():
-    if request.method == 'OPTIONS':
-        return jsonify({}), 200
-
+def build_schedule(data):
+    """Fetch the playlist and save a new schedule; shared by create and adjust."""
     try:
-        data = request.json
-        if not data:
-            return jsonify({'error': 'No data provided'}), 400
-
         # Extract request data
         user_id = data.get('userId')
         playlist_url = data.get('playlistUrl')
@@ -128,11 +133,16 @@ def create_schedule():
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
 
-        # Fetch video details
+        # Fetch video details, rejecting fast when fetch slots are saturated
         try:
-            video_details = fetch_playlist_details(playlist_url)
+            with playlist_fetch_limiter.admit(str(user_id)):
+                video_details = fetch_playlist_details(playlist_url, max_videos=MAX_PLAYLIST_VIDEOS)
             if not video_details:
                 return jsonify({'error': 'No videos found in playlist'}), 400
+        except AdmissionRejected as e:
+            return jsonify({'error': e.message}), e.status_code, {'Retry-After': str(e.retry_after)}
+        except PlaylistTooLargeError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             return jsonify({'error': f'Error fetching playlist: {str(e)}'}), 400
 
@@ -199,7 +209,7 @@ def create_schedule():
                 if old_schedule:
                     # Copy completion status from old schedule
                     completed_map = {
-                        video['link']: video['completed']
+                        video['link']: video.get('completed', False)
                         for day in old_schedule['schedule_data']
                         for video in day['videos']
                     }
@@ -227,6 +237,17 @@ def create_schedule():
         print(f"Error creating schedule: {str(e)}")
         return jsonify({'error': 'Failed to create schedule'}), 500
 
+@app.route('/api/schedule', methods=['POST', 'OPTIONS'])
+def create_schedule():
+    if request.method == 'OPTIONS':
+        return jsonify({}), 200
+
+    data = request.json
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+
+    return build_schedule(data)
+
 @app.route('/api/schedules/<user_id>', methods=['GET', 'OPTIONS'])
 def get_user_schedules(user_id):
     if request.method == 'OPTIONS':
@@ -242,7 +263,9 @@ def get_user_schedules(user_id):
         return jsonify({'schedules': formatted_schedules})
     except Exception as e:
         print(f"Error fetching user schedules: {str(e)}")
-        return jsonify({'error': 'Failed to fetch schedules'}), 500@app.route('/api/schedules/<schedule_id>/adjust', methods=['POST', 'OPTIONS'])
+        return jsonify({'error': 'Failed to fetch schedules'}), 500
+
+@app.route('/api/schedules/<schedule_id>/adjust', methods=['POST', 'OPTIONS'])
 def adjust_schedule(schedule_id):
     if request.method == 'OPTIONS':
         return jsonify({}), 200
@@ -283,7 +306,7 @@ def adjust_schedule(schedule_id):
         adjustment_data['completedVideoDetails'] = completed_video_details
 
         # Create new schedule
-        return create_schedule()
+        return build_schedule(adjustment_data)
 
     except Exception as e:
         print(f"Error adjusting schedule: {str(e)}")
@@ -438,6 +461,8 @@ def debug_schedule(schedule_id):
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
+    # Limiter occupancy is local state, so report it even when a dependency is down
+    playlist_fetches = playlist_fetch_limiter.stats()
     try:
         # Check MongoDB connection
         client.admin.command('ping')
@@ -451,6 +476,7 @@ def health_check():
             'database': 'connected',
             'database_name': DB_NAME,
             'gemini_api': gemini_status,
+            'playlist_fetches': playlist_fetches,
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -458,6 +484,7 @@ def health_check():
         return jsonify({
             'status': 'unhealthy',
             'error': str(e),
+            'playlist_fetches': playlist_fetches,
             'timestamp': datetime.now().isoformat()
         }), 500
 
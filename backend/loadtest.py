@@ -0,0 +1,640 @@
+# loadtest.py
+"""
+Offline load-testing harness for the LearnFast API.
+
+Serves app.py with stand-ins for the live services (mongomock or a local
+mongod, and a fake YouTube playlist provider), drives a weighted mix of
+create / list / detail / progress / adjust traffic at a fixed concurrency,
+and reports throughput plus p50/p95/p99 latency per route.
+
+By default the API runs in-process on a thread-per-request server. With
+--processes it runs in that many child processes sharing one listening
+socket, each with --threads worker threads, so worker counts can be sized
+without the client competing with the server for the GIL. --base-url skips
+the stand-ins and sends the traffic to an external deployment.
+
+Examples:
+    python loadtest.py --concurrency 16 --duration 30
+    python loadtest.py --mongo-uri mongodb://localhost:27017 --reset \
+        --processes 4 --threads 8 --video-latency 0.05 --videos 20-400
+    python loadtest.py --base-url http://staging.example.com --concurrency 32
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from bson import ObjectId
+from pymongo.results import UpdateResult
+from werkzeug.serving import BaseWSGIServer, make_server
+
+ROUTES = ['create', 'list', 'detail', 'progress', 'adjust']
+DEFAULT_MIX = 'create=1,list=4,detail=8,progress=6,adjust=1'
+IDLE_BACKOFF = 0.05
+
+
+# Fake YouTube provider
+
+class FakePlaylistSettings:
+    """Knobs shared by every FakePlaylist instance."""
+    min_videos = 10
+    max_videos = 60
+    video_latency = 0.02
+    video_jitter = 0.5
+    video_failure_rate = 0.0
+    listing_latency = 0.1
+    page_size = 100
+    seed = 1
+
+
+class FakeVideo:
+    """Stand-in for pytubefix.YouTube; metadata is 'fetched' on first access."""
+
+    def __init__(self, video_id, rng):
+        settings = FakePlaylistSettings
+        self.video_id = video_id
+        self.watch_url = f"https://www.youtube.com/watch?v={video_id}"
+        # Draw everything up front so results do not depend on thread scheduling
+        jitter = 1 + rng.uniform(-settings.video_jitter, settings.video_jitter)
+        self._latency = max(settings.video_latency * jitter, 0)
+        self._fails = rng.random() < settings.video_failure_rate
+        self._length = rng.randint(120, 3600)
+        self._title = None
+
+    def _fetch(self):
+        if self._title is not None:
+            return
+        time.sleep(self._latency)
+        if self._fails:
+            raise Exception(f"Simulated fetch failure for {self.video_id}")
+        self._title = f"Lecture {self.video_id}"
+
+    @property
+    def title(self):
+        self._fetch()
+        return self._title
+
+    @property
+    def length(self):
+        self._fetch()
+        return self._length
+
+
+class FakePlaylist:
+    """Stand-in for pytubefix.Playlist with a deterministic size per list id.
+
+    Like pytubefix, `length` only needs the initial page, while `videos` and
+    `video_urls` page through every continuation of `page_size` videos, each
+    costing `listing_latency`.
+    """
+
+    def __init__(self, url):
+        settings = FakePlaylistSettings
+        list_id = url.split('list=')[-1]
+        seed = int(hashlib.md5(f"{settings.seed}:{list_id}".encode()).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+        self._size = rng.randint(settings.min_videos, settings.max_videos)
+        video_ids = [hashlib.md5(f"{list_id}:{index}".encode()).hexdigest()[:11] for index in range(self._size)]
+        self._video_urls = [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
+        self._videos = [FakeVideo(video_id, rng) for video_id in video_ids]
+        self._pages_loaded = 0
+
+    def _load_pages(self, pages):
+        settings = FakePlaylistSettings
+        if pages > self._pages_loaded:
+            time.sleep(settings.listing_latency * (pages - self._pages_loaded))
+            self._pages_loaded = pages
+
+    @property
+    def length(self):
+        self._load_pages(1)
+        return self._size
+
+    @property
+    def video_urls(self):
+        self._load_pages(max(math.ceil(self._size / FakePlaylistSettings.page_size), 1))
+        return self._video_urls
+
+    @property
+    def videos(self):
+        self._load_pages(max(math.ceil(self._size / FakePlaylistSettings.page_size), 1))
+        return self._videos
+
+
+# Mongo stand-in
+
+def _apply_filtered_set(node, parts, value, array_filters):
+    """Apply a `$set` path containing `$[]` / `$[ident]` operators to a document."""
+    head, rest = parts[0], parts[1:]
+    if head == '$[]' or (head.startswith('$[') and head.endswith(']')):
+        ident = head[2:-1]
+        conditions = {
+            key.split('.', 1)[1]: expected
+            for array_filter in array_filters
+            for key, expected in array_filter.items()
+            if key.split('.', 1)[0] == ident
+        }
+        for item in node:
+            if all(item.get(field) == expected for field, expected in conditions.items()):
+                if rest:
+                    _apply_filtered_set(item, rest, value, array_filters)
+        return
+    if not rest:
+        node[head] = value
+        return
+    _apply_filtered_set(node[head], rest, value, array_filters)
+
+
+class MockSchedulesCollection:
+    """mongomock collection wrapper for concurrent use.
+
+    mongomock is not thread-safe, so every call is serialised, cursors are
+    materialised under the lock, and the `array_filters` updates app.py
+    issues are emulated since mongomock does not implement them.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                result = attr(*args, **kwargs)
+                return list(result) if name == 'find' else result
+        return locked
+
+    def update_one(self, filter, update, array_filters=None, **kwargs):
+        with self._lock:
+            if not array_filters:
+                return self._collection.update_one(filter, update, **kwargs)
+            document = self._collection.find_one(filter)
+            if document is None:
+                return UpdateResult({'n': 0, 'nModified': 0}, acknowledged=True)
+            for path, value in update.get('$set', {}).items():
+                _apply_filtered_set(document, path.split('.'), value, array_filters)
+            return self._collection.replace_one({'_id': document['_id']}, document)
+
+
+def load_app(mongo_uri, db_name):
+    """Import app.py bound to the requested Mongo backend and the fake playlist provider."""
+    os.environ['DB_NAME'] = db_name
+    if mongo_uri:
+        os.environ['MONGODB_URI'] = mongo_uri
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            print("Error: mongomock is not installed. Run `pip install mongomock` or pass --mongo-uri")
+            sys.exit(1)
+        import pymongo
+        pymongo.MongoClient = mongomock.MongoClient
+
+    import model
+    model.Playlist = FakePlaylist
+
+    import app as app_module
+    if not mongo_uri:
+        app_module.schedules_collection = MockSchedulesCollection(app_module.schedules_collection)
+    return app_module
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """werkzeug server that handles requests on a fixed-size thread pool."""
+    multithread = True
+
+    def __init__(self, host, port, app, threads, fd=None):
+        super().__init__(host, port, app, fd=fd)
+        self._pool = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        if hasattr(self, '_pool'):
+            self._pool.shutdown(wait=False)
+
+
+def make_api_server(flask_app, port, threads, fd=None):
+    """Build a server with `threads` workers, or one thread per request if 0."""
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    if threads:
+        return PooledWSGIServer('127.0.0.1', port, flask_app, threads, fd=fd)
+    return make_server('127.0.0.1', port, flask_app, threaded=True, fd=fd)
+
+
+def start_server(mongo_uri, db_name, port, threads):
+    """Serve the API on a background thread and return (stop, base_url)."""
+    app_module = load_app(mongo_uri, db_name)
+    server = make_api_server(app_module.app, port, threads)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+    return stop, f"http://127.0.0.1:{server.port}"
+
+
+def _serve_process(fd, mongo_uri, db_name, threads, ready):
+    app_module = load_app(mongo_uri, db_name)
+    server = make_api_server(app_module.app, 0, threads, fd=fd)
+    ready.set()
+    server.serve_forever()
+
+
+def start_server_processes(mongo_uri, db_name, port, processes, threads):
+    """Serve the API from child processes sharing one socket; return (stop, base_url)."""
+    # fork so children inherit the listening socket and FakePlaylistSettings
+    context = multiprocessing.get_context('fork')
+    listener = socket.create_server(('127.0.0.1', port), backlog=socket.SOMAXCONN)
+    children = []
+    for _ in range(processes):
+        ready = context.Event()
+        process = context.Process(target=_serve_process, daemon=True,
+                                  args=(listener.fileno(), mongo_uri, db_name, threads, ready))
+        process.start()
+        children.append((process, ready))
+
+    def stop():
+        for process, _ in children:
+            process.terminate()
+        for process, _ in children:
+            process.join()
+        listener.close()
+
+    for process, ready in children:
+        if not ready.wait(60) or not process.is_alive():
+            stop()
+            raise RuntimeError("API server process failed to start")
+    return stop, f"http://127.0.0.1:{listener.getsockname()[1]}"
+
+
+def reset_schedules(mongo_uri, db_name):
+    """Clear the schedules collection of a real Mongo database."""
+    from pymongo import MongoClient
+    client = MongoClient(mongo_uri)
+    client[db_name].schedules.delete_many({})
+    client.close()
+
+
+# Traffic generation
+
+def http_request(method, url, body=None, timeout=120):
+    """Send a JSON request and return (status, parsed_body, headers)."""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'{}'), response.headers
+    except urllib.error.HTTPError as e:
+        try:
+            payload = json.loads(e.read() or b'{}')
+        except ValueError:
+            payload = {}
+        return e.code, payload, e.headers
+    except (urllib.error.URLError, OSError) as e:
+        return 0, {'error': str(e)}, {}
+
+
+class ScheduleRegistry:
+    """Thread-safe pool of schedules created during the run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._schedules = {}
+
+    def add(self, schedule_id, user_id, schedule):
+        links = [video['link'] for videos in schedule.values() for video in videos if video.get('link')]
+        with self._lock:
+            self._schedules[schedule_id] = (user_id, links)
+
+    def remove(self, schedule_id):
+        with self._lock:
+            self._schedules.pop(schedule_id, None)
+
+    def pick(self, rng):
+        with self._lock:
+            if not self._schedules:
+                return None
+            schedule_id = rng.choice(list(self._schedules))
+            return (schedule_id,) + self._schedules[schedule_id]
+
+
+class Workload:
+    """Issues one request of a given kind against the API."""
+
+    def __init__(self, base_url, users, playlists, registry):
+        self.base_url = base_url
+        self.users = users
+        self.playlists = playlists
+        self.registry = registry
+
+    def create(self, rng, user_id=None):
+        user_id = user_id or rng.choice(self.users)
+        body = {
+            'userId': user_id,
+            'playlistUrl': f"https://www.youtube.com/playlist?list={rng.choice(self.playlists)}",
+            'title': 'Load test schedule',
+        }
+        if rng.random() < 0.5:
+            body.update({'scheduleType': 'daily', 'dailyHours': rng.choice([1, 2, 3])})
+        else:
+            body.update({'scheduleType': 'days', 'targetDays': rng.randint(3, 30)})
+        status, payload, _ = http_request('POST', f"{self.base_url}/api/schedule", body)
+        if status == 200:
+            self.registry.add(payload['scheduleId'], user_id, payload['schedule'])
+        return status
+
+    def list(self, rng):
+        return http_request('GET', f"{self.base_url}/api/schedules/{rng.choice(self.users)}")[0]
+
+    def detail(self, rng):
+        picked = self.registry.pick(rng)
+        if not picked:
+            return None
+        return http_request('GET', f"{self.base_url}/api/schedules/detail/{picked[0]}")[0]
+
+    def progress(self, rng):
+        picked = self.registry.pick(rng)
+        if not picked or not picked[2]:
+            return None
+        schedule_id, _, links = picked
+        body = {'videoId': rng.choice(links), 'completed': rng.random() < 0.8}
+        return http_request('PUT', f"{self.base_url}/api/schedules/{schedule_id}/progress", body)[0]
+
+    def adjust(self, rng):
+        picked = self.registry.pick(rng)
+        if not picked:
+            return None
+        schedule_id, user_id, _ = picked
+        body = {'newDailyHours': rng.choice([1, 1.5, 2, 3])}
+        status, payload, _ = http_request('POST', f"{self.base_url}/api/schedules/{schedule_id}/adjust", body)
+        if status == 200:
+            self.registry.remove(schedule_id)
+            self.registry.add(payload['scheduleId'], user_id, payload['schedule'])
+        return status
+
+
+class Recorder:
+    """Collects per-route latencies and status codes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route, status, elapsed):
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            self.statuses[route][status] += 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def parse_mix(mix):
+    """Parse 'create=1,list=4,...' into a {route: weight} dict."""
+    weights = {}
+    for item in mix.split(','):
+        route, _, weight = item.partition('=')
+        route = route.strip()
+        if route not in ROUTES:
+            raise ValueError(f"Unknown route in mix: {route}")
+        weights[route] = float(weight or 1)
+    if not any(weights.values()):
+        raise ValueError("Traffic mix must have at least one positive weight")
+    return weights
+
+
+def parse_range(value):
+    """Parse 'N' or 'MIN-MAX' into a (min, max) tuple."""
+    low, _, high = value.partition('-')
+    low = int(low)
+    high = int(high) if high else low
+    if low <= 0 or high < low:
+        raise ValueError(f"Invalid range: {value}")
+    return low, high
+
+
+def run_workers(workload, weights, concurrency, duration, max_requests, seed):
+    """Drive traffic until the deadline or request budget is reached."""
+    recorder = Recorder()
+    routes = list(weights)
+    route_weights = [weights[route] for route in routes]
+    deadline = time.perf_counter() + duration
+    budget = {'remaining': max_requests}
+    budget_lock = threading.Lock()
+
+    def take_ticket():
+        if max_requests is None:
+            return True
+        with budget_lock:
+            if budget['remaining'] <= 0:
+                return False
+            budget['remaining'] -= 1
+            return True
+
+    def refund_ticket():
+        if max_requests is None:
+            return
+        with budget_lock:
+            budget['remaining'] += 1
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline and take_ticket():
+            route = rng.choices(routes, route_weights)[0]
+            started = time.perf_counter()
+            status = getattr(workload, route)(rng)
+            if status is None:
+                # Nothing to act on yet (e.g. no schedules); don't spin against the server
+                refund_ticket()
+                time.sleep(IDLE_BACKOFF)
+                continue
+            recorder.record(route, status, time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - started
+
+
+def build_report(recorder, elapsed):
+    """Summarise recorded samples per route and overall."""
+    report = {'elapsed_seconds': round(elapsed, 3), 'routes': {}}
+    all_latencies = []
+    for route in ROUTES + ['total']:
+        if route == 'total':
+            latencies = sorted(all_latencies)
+            statuses = defaultdict(int)
+            for route_statuses in recorder.statuses.values():
+                for status, count in route_statuses.items():
+                    statuses[status] += count
+        else:
+            latencies = sorted(recorder.latencies.get(route, []))
+            statuses = recorder.statuses.get(route, {})
+            all_latencies.extend(latencies)
+        if not latencies:
+            continue
+        ok = sum(count for status, count in statuses.items() if 200 <= status < 300)
+        report['routes'][route] = {
+            'requests': len(latencies),
+            'ok': ok,
+            'errors': len(latencies) - ok,
+            'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2),
+            'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        }
+    return report
+
+
+def print_report(report):
+    print(f"\n=== Load Test Results ({report['elapsed_seconds']}s) ===")
+    header = f"{'route':<10}{'reqs':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  statuses"
+    print(header)
+    print('=' * len(header))
+    for route, stats in report['routes'].items():
+        statuses = ' '.join(f"{status}:{count}" for status, count in stats['statuses'].items())
+        print(f"{route:<10}{stats['requests']:>8}{stats['errors']:>8}{stats['throughput_rps']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}  {statuses}")
+    print()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the LearnFast API against local stand-ins.")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent client workers")
+    parser.add_argument('--duration', type=float, default=20, help="Seconds to run the measured phase")
+    parser.add_argument('--requests', type=int, default=None, help="Stop after this many requests")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="Route weights, e.g. '%s'" % DEFAULT_MIX)
+    parser.add_argument('--users', type=int, default=20, help="Number of distinct users")
+    parser.add_argument('--playlists', type=int, default=10, help="Number of distinct playlists")
+    parser.add_argument('--seed-schedules', type=int, default=1, help="Schedules created per user before measuring")
+    parser.add_argument('--videos', default='10-60', help="Playlist size range, 'N' or 'MIN-MAX'")
+    parser.add_argument('--video-latency', type=float, default=0.02, help="Seconds to fetch one video's metadata")
+    parser.add_argument('--video-jitter', type=float, default=0.5, help="Relative +/- jitter on video latency")
+    parser.add_argument('--video-failure-rate', type=float, default=0.0, help="Probability a video fetch fails")
+    parser.add_argument('--listing-latency', type=float, default=0.1, help="Seconds per playlist listing page of 100 videos")
+    parser.add_argument('--mongo-uri', default=None, help="Use a local mongod instead of mongomock")
+    parser.add_argument('--db-name', default='learnfast_loadtest', help="Database name for the run")
+    parser.add_argument('--reset', action='store_true', help="Clear the schedules collection before running")
+    parser.add_argument('--port', type=int, default=0, help="Port for the API server (0 picks a free one)")
+    parser.add_argument('--processes', type=int, default=0,
+                        help="Serve the API from this many child processes (0 serves in-process)")
+    parser.add_argument('--threads', type=int, default=0,
+                        help="Worker threads per server process (0 uses one thread per request)")
+    parser.add_argument('--base-url', default=None,
+                        help="Send traffic to an external deployment instead of starting the API")
+    parser.add_argument('--seed', type=int, default=1, help="Random seed for traffic and the fake playlist provider")
+    parser.add_argument('--json', dest='json_path', default=None, help="Also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        weights = parse_mix(args.mix)
+        FakePlaylistSettings.min_videos, FakePlaylistSettings.max_videos = parse_range(args.videos)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 1
+    FakePlaylistSettings.video_latency = args.video_latency
+    FakePlaylistSettings.video_jitter = args.video_jitter
+    FakePlaylistSettings.video_failure_rate = args.video_failure_rate
+    FakePlaylistSettings.listing_latency = args.listing_latency
+    FakePlaylistSettings.seed = args.seed
+
+    if args.base_url and (args.processes or args.reset):
+        print("Error: --processes and --reset cannot be used with --base-url")
+        return 1
+    if args.processes > 1 and not args.mongo_uri:
+        print("Error: --processes > 1 needs --mongo-uri; each process would get its own mongomock database")
+        return 1
+
+    if args.reset and args.mongo_uri:
+        reset_schedules(args.mongo_uri, args.db_name)
+    if args.base_url:
+        stop, base_url = (lambda: None), args.base_url.rstrip('/')
+    elif args.processes:
+        stop, base_url = start_server_processes(args.mongo_uri, args.db_name, args.port,
+                                                args.processes, args.threads)
+    else:
+        stop, base_url = start_server(args.mongo_uri, args.db_name, args.port, args.threads)
+
+    rng = random.Random(args.seed)
+    users = [str(ObjectId()) for _ in range(args.users)]
+    playlists = [f"PLload{index:04d}{rng.randrange(16 ** 8):08x}" for index in range(args.playlists)]
+    registry = ScheduleRegistry()
+    workload = Workload(base_url, users, playlists, registry)
+
+    print("\n=== LearnFast Load Test ===")
+    print(f"Server: {base_url}")
+    if not args.base_url:
+        processes = f"{args.processes} process(es)" if args.processes else "in-process"
+        threads = f"{args.threads} thread(s)" if args.threads else "thread per request"
+        print(f"Workers: {processes}, {threads}")
+        print(f"Mongo: {args.mongo_uri or 'mongomock'} / {args.db_name}")
+        print(f"Playlists: {args.videos} videos, {args.video_latency}s/video, "
+              f"{args.video_failure_rate:.0%} failures")
+    print(f"Concurrency: {args.concurrency}, duration: {args.duration}s, mix: {args.mix}")
+
+    try:
+        print(f"Seeding {args.seed_schedules * len(users)} schedules...")
+        for user_id in users:
+            for _ in range(args.seed_schedules):
+                workload.create(rng, user_id=user_id)
+
+        recorder, elapsed = run_workers(workload, weights, args.concurrency,
+                                        args.duration, args.requests, args.seed)
+    finally:
+        stop()
+
+    report = build_report(recorder, elapsed)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -52,17 +52,42 @@ def fetch_single_video(video):
         print(f"Error processing video: {str(e)}")
         return None
 
-def fetch_playlist_details(playlist_url):
+class PlaylistTooLargeError(ValueError):
+    """Raised when a playlist has more videos than the server will import."""
+
+def check_playlist_size(video_count, max_videos):
+    """Raise PlaylistTooLargeError if a known video count exceeds the limit."""
+    if video_count is not None and video_count > max_videos:
+        raise PlaylistTooLargeError(
+            f"Playlist has {video_count} videos; the maximum is {max_videos}"
+        )
+
+def fetch_playlist_details(playlist_url, max_videos=None):
     """Fetch details of all videos in a playlist using concurrent processing."""
     try:
         playlist = Playlist(playlist_url)
-        if not playlist.videos:
+
+        # Check playlist size from the initial page, before paging through every video
+        video_count = None
+        if max_videos is not None:
+            try:
+                video_count = playlist.length
+            except (KeyError, IndexError, TypeError, ValueError):
+                video_count = None
+            check_playlist_size(video_count, max_videos)
+
+        videos = playlist.videos
+        if not videos:
             raise ValueError("The playlist is empty or inaccessible.")
+
+        # Fall back to counting the full listing if the initial page had no count
+        if max_videos is not None and video_count is None:
+            check_playlist_size(len(videos), max_videos)
         
         # Use ThreadPoolExecutor for parallel processing
         with concurrent.futures.ThreadPoolExecutor() as executor:
             # Process videos concurrently
-            video_details = list(executor.map(fetch_single_video, playlist.videos))
+            video_details = list(executor.map(fetch_single_video, videos))
         
         # Filter out None values (failed videos)
         video_details = [video for video in video_details if video is not None]
@@ -71,6 +96,8 @@ def fetch_playlist_details(playlist_url):
             raise ValueError("No valid videos found in playlist")
         
         return video_details
+    except PlaylistTooLargeError:
+        raise
     except Exception as e:
         raise Exception(f"Error fetching playlist details: {str(e)}")
 